@@ -0,0 +1,93 @@
+#----------------------------------------------------------------------------
+# NVMe Test Startup Benchmark
+#----------------------------------------------------------------------------
+
+# Standard libraries
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Time to first IO of a test process: config, device discovery and namespace
+# info, each child mirrors one startup path end to end. Both children import
+# nose and nothing in a nosetests child is imported lazily, so the difference
+# comes from replacing the sysfs tree walk and id-ns with direct sysfs reads.
+CHILDREN = (
+    # baseline startup: nose, nvme.json, sysfs tree walk and id-ns, kept
+    # self-contained so it does not load this tree's nvme_utils/nvme_profile
+    ('legacy', r'''
+import time
+t0 = time.perf_counter()
+import os, re, json, subprocess
+from nose.tools import assert_equal
+def exec_shell_cmd(cmd):
+    proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+    status = proc.wait()
+    return status, [x.decode("utf-8").rstrip() for x in proc.stdout.readlines()]
+ns1 = "/dev/nvme0n1"
+if os.path.exists("nvme.json"):
+    with open("nvme.json", "r") as cfg:
+        ns1 = json.load(cfg)["ns1"]
+err = subprocess.call(r"find /sys/devices -name \*nvme0 | grep -i pci", shell=True,
+        stdout=subprocess.DEVNULL)
+assert_equal(err, 0, "ERROR: no NVMe devices found")
+status, lines = exec_shell_cmd("nvme id-ns {}".format(ns1))
+assert_equal(status, 0, "".join(lines))
+re.search(r"nsze\s+:\s+(\w+)", " ".join(lines))
+print("STARTUP {:.6f}".format(time.perf_counter() - t0))
+'''),
+    # current startup: /sys/class/nvme lookup and sysfs namespace info
+    ('sysfs', r'''
+import time
+t0 = time.perf_counter()
+from test_nvme import TestNvme
+TestNvme.validate_pci_device()
+TestNvme().get_ns_info()
+print("STARTUP {:.6f}".format(time.perf_counter() - t0))
+'''),
+)
+
+
+def run_child(code):
+    # children import the test modules and read nvme.json from py_tests
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], cwd=cwd,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+    text = proc.stdout.decode('utf-8')
+    for line in text.splitlines():
+        if line.startswith('STARTUP '):
+            return wall, float(line.split()[1])
+    print(text, file=sys.stderr)
+    return wall, None
+
+
+def bench(name, code, loops):
+    walls, startups = [], []
+    for i in range(loops):
+        wall, startup = run_child(code)
+        if startup is None:
+            print("{}: test process failed".format(name))
+            return
+        walls.append(wall)
+        startups.append(startup)
+    print("{:6}: time to first IO = {:.3f} ms, process wall = {:.3f} ms".format(
+            name, 1000 * min(startups), 1000 * min(walls)))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python {}'.format(sys.argv[0]),
+            description="Benchmark nvme test startup time")
+    parser.add_argument('-n', '--loops', type=int, default=5,
+            help="Number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    for name, code in CHILDREN:
+        bench(name, code, args.loops)
+
+
+if __name__ == '__main__':
+    main()
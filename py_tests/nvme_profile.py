@@ -0,0 +1,186 @@
+#----------------------------------------------------------------------------
+# NVMe Test Profiler
+#----------------------------------------------------------------------------
+
+# Standard libraries
+import os
+import sys
+import time
+import atexit
+import signal
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Profile settings are passed from run_nvme_test.py to each nosetests child
+PROFILE_ENV      = 'NVME_PROFILE'
+PROFILE_DIR_ENV  = 'NVME_PROFILE_DIR'
+PROFILE_NAME_ENV = 'NVME_PROFILE_NAME'
+PROFILE_MODES    = ('span', 'cprofile', 'sample')
+
+# Sampling period of the 'sample' mode in seconds
+SAMPLE_INTERVAL = 0.001
+
+PROFILE_MODE = os.environ.get(PROFILE_ENV, '')
+PROFILE_EN   = PROFILE_MODE in PROFILE_MODES
+
+
+class NvmeProfiler(object):
+    """
+    Span timers plus optional cProfile/sampling profiler for one test process.
+    All outputs are collapsed stacks ('a;b;c count'), usable by flamegraph.pl.
+    """
+
+    def __init__(self, mode, out_dir, name):
+        self.mode    = mode
+        self.out_dir = out_dir
+        self.name    = name
+        # span stack -> [calls, total seconds]
+        self.spans   = defaultdict(lambda: [0, 0.0])
+        # sampled stack -> hits
+        self.stacks  = defaultdict(int)
+        self.__local = threading.local()
+        # spans are also opened by the SMART sampler thread
+        self.__lock  = threading.Lock()
+        self.__prof  = None
+
+    def start(self):
+        if self.mode == 'cprofile':
+            import cProfile
+            self.__prof = cProfile.Profile()
+            self.__prof.enable()
+        elif self.mode == 'sample':
+            # wall-clock sampling, so time spent waiting on the device
+            # (nvme-cli/dd child processes) shows up in the graph as well
+            signal.signal(signal.SIGALRM, self.__sample)
+            signal.setitimer(signal.ITIMER_REAL, SAMPLE_INTERVAL, SAMPLE_INTERVAL)
+
+    def stop(self):
+        if self.mode == 'cprofile':
+            self.__prof.disable()
+        elif self.mode == 'sample':
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+    def __sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{}:{}'.format(
+                    os.path.basename(code.co_filename), code.co_name))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    @contextmanager
+    def span(self, name):
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = []
+        stack.append(name)
+        key = ';'.join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.__lock:
+                self.spans[key][0] += 1
+                self.spans[key][1] += elapsed
+
+    def report(self):
+        """
+        Print per-stage span summary and dump collapsed stacks.
+        """
+        print("Profile ({}): {}".format(self.mode, self.name))
+        for key, (calls, total) in sorted(self.spans.items()):
+            print("  {:40} calls={:6} total={:.6f} s avg={:.6f} s".format(
+                    key, calls, total, total / calls))
+
+        if not os.path.exists(self.out_dir):
+            os.makedirs(self.out_dir)
+        prefix = os.path.join(self.out_dir, self.name)
+
+        # span self-time in microseconds, so nested spans are not counted twice
+        self_time = {k: v[1] for k, v in self.spans.items()}
+        for key, (_, total) in self.spans.items():
+            parent = key.rpartition(';')[0]
+            if parent in self_time:
+                self_time[parent] -= total
+        self.__write_folded('{}.span.folded'.format(prefix),
+                {k: int(max(v, 0) * 1e6) for k, v in self_time.items()})
+
+        if self.mode == 'cprofile':
+            self.__prof.dump_stats('{}.prof'.format(prefix))
+            self.__write_folded('{}.cprofile.folded'.format(prefix),
+                    self.__cprofile_stacks())
+        elif self.mode == 'sample':
+            self.__write_folded('{}.sample.folded'.format(prefix), self.stacks)
+
+    def __cprofile_stacks(self):
+        """
+        cProfile only records caller->callee edges, so fold them into
+        two-level stacks weighted by inline time in microseconds.
+        """
+        import pstats
+        stacks = defaultdict(int)
+        stats = pstats.Stats(self.__prof).stats
+        for (fname, _, func), (_, _, tt, _, callers) in stats.items():
+            callee = '{}:{}'.format(os.path.basename(fname), func)
+            if not callers:
+                stacks[callee] += int(tt * 1e6)
+            for (cfname, _, cfunc), (_, _, ctt, _) in callers.items():
+                caller = '{}:{}'.format(os.path.basename(cfname), cfunc)
+                stacks['{};{}'.format(caller, callee)] += int(ctt * 1e6)
+        return stacks
+
+    @staticmethod
+    def __write_folded(fname, stacks):
+        with open(fname, 'w') as fh:
+            for key, count in sorted(stacks.items()):
+                if count > 0:
+                    fh.write('{} {}\n'.format(key, count))
+
+
+PROFILER = None
+if PROFILE_EN:
+    PROFILER = NvmeProfiler(PROFILE_MODE,
+            os.environ.get(PROFILE_DIR_ENV, 'logs/profile'),
+            os.environ.get(PROFILE_NAME_ENV, os.path.basename(sys.argv[0])))
+    PROFILER.start()
+
+    @atexit.register
+    def _report_profile():
+        PROFILER.stop()
+        PROFILER.report()
+
+
+@contextmanager
+def _null_span():
+    yield
+
+
+def span(name):
+    """
+    Context manager timing a named stage, a no-op when profiling is off.
+    """
+    if PROFILER is None:
+        return _null_span()
+    return PROFILER.span(name)
+
+
+def profile_span(name):
+    """
+    Decorator timing every call of a function as a named stage.
+    Functions are returned untouched when profiling is off.
+    """
+    def outer(func):
+        if PROFILER is None:
+            return func
+        @wraps(func)
+        def inner(*args, **kwargs):
+            with PROFILER.span(name):
+                return func(*args, **kwargs)
+        return inner
+    return outer
@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------
+# NVMe SMART/Health Sampler
+#----------------------------------------------------------------------------
+
+# Standard libraries
+import re
+import time
+import threading
+
+# User-defined libraries
+from nvme_utils import NvmeCli, IO_TIMELINE
+
+# SMART log fields which only increase while the device is throttling
+THROTTLE_FIELDS = (
+    'Warning Temperature Time',
+    'Critical Composite Temperature Time',
+    'Thermal Management T1 Trans Count',
+    'Thermal Management T2 Trans Count',
+    'Thermal Management T1 Total Time',
+    'Thermal Management T2 Total Time',
+)
+
+# critical_warning bit 1: temperature is over/under the threshold
+CW_TEMPERATURE = 0x2
+
+
+class SmartSampler(object):
+    """
+    Poll the SMART/Health log page in background and line the samples up
+    with the per-command IO latency timeline.
+    """
+
+    def __init__(self, ctrler, interval=1.0):
+        """
+        @param ctrler: Controller device used by smart-log, e.g. /dev/nvme0
+        @param interval: Polling interval in seconds, 0 disables the sampler
+        """
+        self.ctrler   = ctrler
+        self.interval = interval
+        self.samples  = []
+        self.__stop   = threading.Event()
+        self.__thread = None
+
+    @NvmeCli(opc='smart-log')
+    def _smart_log(self, *args, **kwargs):
+        return args
+
+    def start(self):
+        if self.interval <= 0 or self.__thread:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        if not self.__thread:
+            return
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+        # always take a closing sample so short tests get a throttle delta
+        self.sample()
+
+    def __run(self):
+        while True:
+            self.sample()
+            if self.__stop.wait(self.interval):
+                break
+
+    def sample(self):
+        """
+        Read the SMART log once and append it to the sample list.
+        """
+        kwargs = {'ns1': self.ctrler, 'args': ''}
+        status, lines = self._smart_log(**kwargs)
+        if status != 0:
+            return
+        fields = self.parse_smart_log(lines)
+        if fields:
+            self.samples.append((time.time(), fields))
+
+    @staticmethod
+    def parse_smart_log(lines):
+        """
+        Parse smart-log text into a dict of integer fields.
+        """
+        fields = {}
+        pat = re.compile(r'^(\w[\w\s]*?)\s+:\s+(0x[0-9a-fA-F]+|-?\d+)')
+        for line in lines:
+            mat = pat.match(line)
+            if mat:
+                fields[mat.group(1)] = int(mat.group(2), 0)
+        return fields
+
+    def throttle_events(self):
+        """
+        Return the timestamps of samples where the device was throttling.
+        A sample is a throttle event when any throttle counter increased
+        since the previous sample, or the temperature warning bit is set.
+        """
+        events = []
+        prev = None
+        for ts, fields in self.samples:
+            hot = fields.get('critical_warning', 0) & CW_TEMPERATURE
+            if prev is not None:
+                hot = hot or any(fields.get(f, 0) > prev.get(f, 0)
+                        for f in THROTTLE_FIELDS)
+            if hot:
+                events.append(ts)
+            prev = fields
+        return events
+
+    def report(self):
+        """
+        Print SMART samples and IO commands on a single timeline.
+        SMART rows are stamped at sample time, IO rows at command start.
+        """
+        if not self.samples:
+            return
+        events = set(self.throttle_events())
+        rows = [(ts, 0, fields) for ts, fields in self.samples]
+        rows += [(ts, 1, io) for ts, *io in IO_TIMELINE]
+        rows.sort(key=lambda x: (x[0], x[1]))
+        t0 = rows[0][0]
+
+        print(("SMART/IO timeline (IO at start time): {} samples, {} io cmds, "
+                "{} throttle events").format(
+                len(self.samples), len(IO_TIMELINE), len(events)))
+        for ts, kind, data in rows:
+            if kind == 0:
+                sensors = ' '.join('{}C'.format(v) for k, v in sorted(data.items())
+                        if k.startswith('Temperature Sensor'))
+                print("  {:10.3f}s SMART temp={}C {}{}".format(ts - t0,
+                        data.get('temperature', 0), sensors,
+                        ' THROTTLE' if ts in events else ''))
+            else:
+                op, num_bytes, latency = data
+                mbps = num_bytes / (1024.0 * 1024.0 * latency) if latency else 0.0
+                print("  {:10.3f}s IO    {:5} start bytes={} latency={} s rate={:.2f} MB/s".format(
+                        ts - t0, op, num_bytes, latency, mbps))
@@ -0,0 +1,55 @@
+#----------------------------------------------------------------------------
+# NVMe Device State (sysfs)
+#----------------------------------------------------------------------------
+
+# Standard libraries
+import os
+
+SYSFS_NVME  = '/sys/class/nvme'
+SYSFS_BLOCK = '/sys/block'
+
+# /sys/block/<ns>/size is always counted in 512-byte sectors
+SECTOR_SIZE = 512
+
+
+def _read_attr(path):
+    try:
+        with open(path, 'r') as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def is_pci_ctrler(name):
+    """
+    Check a controller (e.g. nvme0) is present and attached to PCI.
+    /sys/class/nvme/<name> links into /sys/devices, so only that link is
+    resolved instead of walking the whole sysfs tree.
+    """
+    path = os.path.join(SYSFS_NVME, name)
+    return os.path.exists(path) and 'pci' in os.path.realpath(path).lower()
+
+
+def get_ctrler_state(name):
+    """
+    Controller state reported by the driver, e.g. 'live', or None if the
+    kernel does not export it.
+    """
+    return _read_attr(os.path.join(SYSFS_NVME, name, 'state'))
+
+
+def get_ns_info(ns):
+    """
+    Return (NSZE, LBADS) of a namespace block device from sysfs, or None
+    if it is not exported or has zero capacity. The block layer updates
+    these attributes on format/resize/rescan, so they are never stale.
+    """
+    name = os.path.basename(ns)
+    size = _read_attr(os.path.join(SYSFS_BLOCK, name, 'size'))
+    lbs  = _read_attr(os.path.join(SYSFS_BLOCK, name, 'queue', 'logical_block_size'))
+    # the kernel sets capacity 0 for formats it cannot use (e.g. LBA size
+    # above PAGE_SIZE, unsupported PI), while passthrough IO still works
+    if not size or not lbs or int(size) == 0:
+        return None
+    lba_ds = int(lbs)
+    return int(size) * SECTOR_SIZE // lba_ds, lba_ds
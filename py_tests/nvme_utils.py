@@ -5,9 +5,16 @@
 #----------------------------------------------------------------------------
 
 # Satndard libraries
+import time
 import subprocess
 from functools import wraps
 
+# User-defined libraries
+from nvme_profile import span
+
+# Per-command IO timeline: (start timestamp, op, num_bytes, latency)
+IO_TIMELINE = []
+
 
 def exec_shell_cmd(cmd, cmdlog_en=False):
     if cmdlog_en:
@@ -25,7 +32,11 @@ def calc_avg_bw(t=""):
         @wraps(func)
         def inner(*args, **kwargs):
             nonlocal num_bytes, seconds
+            # stamp the start, a long dd transfer must line up with the
+            # SMART samples taken while it was running
+            start = time.time()
             status, bw = func(*args, **kwargs)
+            IO_TIMELINE.append((start, t, bw[0], bw[1]))
             num_bytes += bw[0]
             seconds += bw[1]
             if seconds == 0:
@@ -52,7 +63,8 @@ class NvmeCli(object):
             opcode = self.__opc or kwargs['opc']
             cmd = 'nvme {v} {opc} {ns1} {args}'.format(
                     v=self.__vendor, opc=opcode, **kwargs)
-            status, lines = exec_shell_cmd(cmd, kwargs.get('cmdlog_en', False))
+            with span('nvme {}'.format(opcode)):
+                status, lines = exec_shell_cmd(cmd, kwargs.get('cmdlog_en', False))
             args += (status, lines)
             return func(*args, **kwargs)
         return wrapper
@@ -14,11 +14,11 @@ import argparse
 import subprocess
 from functools import reduce
 from datetime import datetime
-from nose.tools import assert_equal
 
 # User-defined libraries
-from test_nvme import TestNvme
 from nvme_logger import NvmeLogger
+from nvme_profile import (PROFILE_ENV, PROFILE_DIR_ENV, PROFILE_NAME_ENV,
+        PROFILE_MODES)
 
 # NVMe Test IDs (Read-Only)
 NVME_TESTS = (
@@ -38,13 +38,25 @@ class RunTest(object):
     Run Nvme Test.
     """
 
-    def __init__(self, log_file, bw_file):
+    def __init__(self, log_file, bw_file, profile=None):
         self.bw_file = bw_file 
         self.log_file = log_file
-        self.driver = TestNvme()
+        self.profile = profile
+        self.__driver = None
         self.sel_tests = [z for z in NVME_TESTS if z[2]]
         self.bw_size = 0
 
+    @property
+    def driver(self):
+        """
+        Device driver, imported on first use since it pulls in nose which
+        the debug mode never needs in this process.
+        """
+        if self.__driver is None:
+            from test_nvme import TestNvme
+            self.__driver = TestNvme()
+        return self.__driver
+
     def query(self):
         if len(self.sel_tests) == 1:
             test_bitmap = self.sel_tests[0][1]
@@ -73,13 +85,27 @@ class RunTest(object):
             cmd = 'nosetests -v --nocapture {}'.format(item[3])
             # nose uses sys.stderr as the default streaming, so we have to 
             # redirect stderr to stdout
-            proc = subprocess.Popen(cmd, shell=True, 
+            proc = subprocess.Popen(cmd, shell=True, env=self.test_env(item[0]),
                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-            proc.wait()
-            for line in proc.stdout.readlines():
+            # drain the pipe while waiting, a long SMART/IO timeline would
+            # otherwise fill it and block the test process forever
+            out, _ = proc.communicate()
+            for line in out.splitlines(True):
                 print(line.decode('utf-8'))
             print("\n")
 
+    def test_env(self, name):
+        """
+        Environment of a test process, profiling is enabled through it.
+        """
+        env = dict(os.environ)
+        if self.profile:
+            log_dir = os.path.dirname(self.log_file) if self.log_file else 'logs'
+            env[PROFILE_ENV] = self.profile
+            env[PROFILE_DIR_ENV] = os.path.join(log_dir, 'profile')
+            env[PROFILE_NAME_ENV] = name
+        return env
+
     def update_test_status(self):
         """
         Check and update test status.
@@ -157,6 +183,10 @@ def main():
             help="Run nvme tests in debug mode")
     parser.add_argument('-t', '--test', nargs='?', type=int, 
             help="Specify which tests will be executed")
+    parser.add_argument('-p', '--profile', nargs='?', const='span',
+            choices=PROFILE_MODES,
+            help=("Profile each test: span timers only (default), plus cProfile "
+                  "or plus sampling; collapsed stacks go to <log_dir>/profile"))
     args = parser.parse_args()
 
     log_file = None
@@ -179,7 +209,7 @@ def main():
         sys.stdout = NvmeLogger(logging.getLogger('STDOUT'))
         sys.stderr = NvmeLogger(logging.getLogger('STDERR'), logging.ERROR)
 
-    tester = RunTest(log_file, bw_file)
+    tester = RunTest(log_file, bw_file, args.profile)
     if not args.debug and not tester.query():
         print('No test selected by user')
         return
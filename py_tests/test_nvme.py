@@ -9,7 +9,6 @@ import os
 import re
 import sys
 import json
-import subprocess
 
 # Third-party libraries
 from nose import tools
@@ -17,6 +16,7 @@ from nose.tools import assert_equal
 
 # User-defined libraries
 from nvme_utils import NvmeCli
+import nvme_state
 
 
 class TestNvme(object):
@@ -24,6 +24,9 @@ class TestNvme(object):
     Base class for Nvme Tests.
     """
 
+    # configs are loaded once per test process
+    _configs = None
+
     def __init__(self):
         """
         @param cfg: Config file (json format) used to set controller, default namespace, etc.
@@ -34,22 +37,29 @@ class TestNvme(object):
         self.ns1       = "/dev/nvme0n1"
         self.max_lba   = 1 << 17
         self.lba_ds    = 4096
+        # SMART/health log polling interval in seconds, 0 to disable
+        self.smart_interval = 1.0
 
-        if os.path.exists(cfg):
-            self._load_config(cfg)
+        if TestNvme._configs is None and os.path.exists(cfg):
+            TestNvme._configs = self._load_config(cfg)
+        if TestNvme._configs:
+            configs = TestNvme._configs
+            self.ctrler  = configs['ctrler']
+            self.ns1     = configs['ns1']
+            self.smart_interval = configs.get('smart_interval',
+                    self.smart_interval)
 
     def _load_config(self,  fname):
         with open(fname, 'r') as cfg:
-            configs = json.load(cfg)
-            self.ctrler  = configs['ctrler']
-            self.ns1     = configs['ns1']
+            return json.load(cfg)
 
     @tools.nottest
     @staticmethod
     def validate_pci_device():
-        cmd = r'find /sys/devices -name \*nvme0 | grep -i pci'
-        err = subprocess.call(cmd, shell=True)
-        assert_equal(err, 0, "ERROR: no NVMe devices found")
+        base = TestNvme()
+        name = os.path.basename(base.ctrler)
+        assert_equal(nvme_state.is_pci_ctrler(name), True,
+                "ERROR: no NVMe devices found")
 
     @tools.nottest
     @NvmeCli(opc='control-test', vendor='marvell')
@@ -107,7 +117,19 @@ class TestNvme(object):
     def get_ns_info(self):
         """
         Get namespace size and LBA data size.
+        Read from sysfs when the namespace is bound to a block device,
+        otherwise fall back to identify namespace.
         """
+        info = nvme_state.get_ns_info(self.ns1)
+        if info:
+            # controller health check in place of the id-ns status
+            ctrl_state = nvme_state.get_ctrler_state(os.path.basename(self.ctrler))
+            assert_equal(ctrl_state in (None, 'live'), True,
+                    "ERROR: controller state is {}".format(ctrl_state))
+            self.max_lba, self.lba_ds = info
+            print("NSZE={}, LBADS={} (sysfs)".format(self.max_lba, self.lba_ds))
+            return
+
         # default size
         kwargs = {'ns1': self.ns1, 'args': ''} 
         status, lines = self._id_ns(**kwargs)
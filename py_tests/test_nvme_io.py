@@ -21,6 +21,8 @@ from nose.tools import assert_equal
 # User-defined libraries
 from test_nvme import TestNvme
 from nvme_utils import exec_shell_cmd, calc_avg_bw
+from nvme_smart import SmartSampler
+from nvme_profile import profile_span
 
 
 TIME_UNIT = {'us': 0.000001, 'ms': 0.001, 's': 1}
@@ -48,16 +50,22 @@ class TestNvmeIo(TestNvme):
     @classmethod
     def setup_class(cls):
         TestNvme.validate_pci_device();
+        # sample SMART/health log in background to correlate with IO latency
+        base = TestNvme()
+        cls.smart = SmartSampler(base.ctrler, base.smart_interval)
+        cls.smart.start()
 
     @classmethod
     def teardown_class(cls):
-        pass
+        cls.smart.stop()
+        cls.smart.report()
 
     @tools.nottest
     def __clear_rd_file(self):
         open(self.rd_file, 'w').close()
 
     @tools.nottest
+    @profile_span('data_gen')
     def __gen_rand_data_file(self, num_dws=1024):
         with open(self.wr_file, 'w') as wf:
             for i in range(num_dws):
@@ -66,6 +74,11 @@ class TestNvmeIo(TestNvme):
                 wf.write(''.join(dw))
         return True 
 
+    @tools.nottest
+    @profile_span('data_compare')
+    def __compare_files(self, f1, f2):
+        return filecmp.cmp(f1, f2)
+
     @tools.nottest
     def __get_rand_video_file(self):
         files = ('small.mp4', 'medium.mp4', 'large.mp4')
@@ -101,6 +114,7 @@ class TestNvmeIo(TestNvme):
                 ' --latency'.format(slba, nlb, num_bytes, fname))
 
     @tools.nottest
+    @profile_span('io_read')
     @calc_avg_bw("Read")
     def io_read(self, slba, nlb, num_bytes, fname, use_dd=False, bwlog_en=False, cmdlog_en=False):
 
@@ -119,6 +133,7 @@ class TestNvmeIo(TestNvme):
         return status, (num_bytes, latency)
 
     @tools.nottest
+    @profile_span('io_write')
     @calc_avg_bw("Write")
     def io_write(self, slba, nlb, num_bytes, fname, use_dd=False, bwlog_en=False, cmdlog_en=False):
         if not use_dd:
@@ -157,7 +172,7 @@ class TestNvmeIo(TestNvme):
             assert_equal(self.__gen_rand_data_file(num_dws), True)
             assert_equal(self.io_write(slba, nlb, num_dws<<2, self.wr_file, bwlog_en=bwlog_en), 0)
             assert_equal(self.io_read(slba, nlb, num_dws<<2, self.rd_file, bwlog_en=bwlog_en), 0)
-            assert_equal(filecmp.cmp(self.wr_file, self.rd_file), True)
+            assert_equal(self.__compare_files(self.wr_file, self.rd_file), True)
 
     def test_bulk_data_xfer(self):
         """
@@ -179,7 +194,7 @@ class TestNvmeIo(TestNvme):
 
         assert_equal(self.io_write(slba, nlb, num_bytes, wr_file, use_dd=True, bwlog_en=True, cmdlog_en=True), 0)
         assert_equal(self.io_read(slba, nlb, num_bytes, self.rd_file, use_dd=True, bwlog_en=True, cmdlog_en=True), 0)
-        assert_equal(filecmp.cmp(wr_file, self.rd_file), True)
+        assert_equal(self.__compare_files(wr_file, self.rd_file), True)
 
     def test_bulk_data_xfer_128k(self):
         """
@@ -237,7 +252,7 @@ class TestNvmeIo(TestNvme):
             assert_equal(self.io_read(slba, nlb, num_bytes, self.rd_file), 0)
 
         # sanity check
-        assert_equal(filecmp.cmp(wr_file, self.rd_file), True)
+        assert_equal(self.__compare_files(wr_file, self.rd_file), True)
 
     def test_data_compare(self):
         """